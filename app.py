@@ -9,6 +9,7 @@
     in the same folder as the script.  The files will be named:
         * user_emails.json
             * Contains user.id -> user.email
+            * Only users with an assigned number if ASSIGNED_USER_EMAILS_ONLY
         * user_phone_numbers.json
             * Contains phone_number.assignee.id -> phone_number.number
         * user_extensions.json
@@ -25,25 +26,51 @@
             * pip install pydantic-settings
         * requests
             * pip install requests
+        * orjson
+            * pip install orjson
 """
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus, HTTPMethod
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import SecretStr, HttpUrl
+from pydantic import Field, HttpUrl, SecretStr, TypeAdapter, field_validator
 from pathlib import Path
 from loguru import logger
 from logging import INFO
+import hashlib
+import threading
+import time
 import sys
 import os
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlencode
+from urllib3.util.retry import Retry
 import requests
+import orjson
 import json
 
 
 SCRIPT_ROOT = sys.path[0]
 
+#   Built once; constructing a TypeAdapter compiles a validation schema
+_HTTP_URL = TypeAdapter(HttpUrl)
+
 
 class Settings(BaseSettings):
     """A class to load strongly typed settings from ./.env"""
@@ -56,18 +83,64 @@ class Settings(BaseSettings):
 
     # Zoom authentication requirements
     # https://developers.zoom.us/docs/internal-apps/s2s-oauth/
-    ZOOM_AUTH_URL: HttpUrl = "https://zoom.us/oauth/token"
+    ZOOM_AUTH_URL: str = "https://zoom.us/oauth/token"
     ZOOM_CLIENT_ID: str
     ZOOM_CLIENT_SECRET: SecretStr
     ZOOM_ACCOUNT_ID: str
     ZOOM_GRANT_TYPE: str = "account_credentials"
 
+    # Access tokens are cached here between runs until shortly before they
+    # expire, so repeated runs within the token lifetime skip auth()
+    TOKEN_CACHE: bool = True
+    TOKEN_CACHE_DIR: Path = Path.home() / ".cache" / "zoom_phone"
+
+    # Only look up the emails of users with an assigned phone number instead
+    # of listing every phone user.  Fewer requests when most users have no
+    # number, but user_emails.json then only contains those users (still
+    # only active ones).
+    ASSIGNED_USER_EMAILS_ONLY: bool = False
+
+    # Upper bound on concurrent per-id requests (e.g. user lookups).  Keep it
+    # within Zoom's rate limits and the session's connection pool size (16).
+    MAX_CONCURRENT_REQUESTS: int = 8
+
+    # Seconds to reuse GET responses cached on disk, keyed by URL and query.
+    # Meant for development and re-runs; 0 (the default) disables the cache.
+    # A cached page carries the next_page_token for the following page, and
+    # Zoom expires those after about 15 minutes, so the TTL is capped at 10.
+    ZOOM_CACHE_TTL: int = Field(default=0, ge=0, le=600)
+    RESPONSE_CACHE_DIR: Path = Path(SCRIPT_ROOT) / ".cache"
+
     # Zoom API information
     # https://developers.zoom.us/docs/api/rest/reference/phone/methods
-    ZOOM_API_URL: HttpUrl = "https://api.zoom.us/v2"
-    ZOOM_ENDPOINTS: Dict[
-        str, Dict[str, Dict[str, Union[str, List, None, Dict, HTTPMethod]]]
-    ] = {
+    ZOOM_API_URL: str = "https://api.zoom.us/v2"
+
+    @field_validator("ZOOM_AUTH_URL", "ZOOM_API_URL")
+    @classmethod
+    def validate_url(cls, value: str) -> str:
+        """Validate the URLs once on load, but keep them as plain strings.
+
+        Pydantic URL objects rebuild their string form on every str() call.
+        """
+        return str(_HTTP_URL.validate_python(value))
+
+
+def freeze(mapping: Mapping) -> Mapping:
+    """Recursively wrap a dict (and any nested dicts) in read-only views."""
+    return MappingProxyType(
+        {
+            key: freeze(value) if isinstance(value, dict) else value
+            for key, value in mapping.items()
+        }
+    )
+
+
+#   Zoom API endpoints
+#   https://developers.zoom.us/docs/api/rest/reference/phone/methods
+#   These are static, so they are built and frozen once at import instead
+#   of being a Settings field that pydantic validates and copies per instance.
+ZOOM_ENDPOINTS: Final[Mapping[str, Mapping[str, Mapping[str, Any]]]] = freeze(
+    {
         "PHONES": {
             "GET_ALL": {
                 "METHOD": HTTPMethod.GET,
@@ -109,23 +182,85 @@ class Settings(BaseSettings):
             },
         },
     }
+)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings from ./.env on first use and reuse them afterwards."""
+    return Settings()
+
 
+def __getattr__(name: str) -> Any:
+    """Keep `settings` available as a module attribute, loaded on first access."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-#   Load settings from ./.env
-settings = Settings()
 
-#   Configure logging
-logger.level = settings.LOG_LEVEL
-if settings.LOG_FILE:
-    logger.add(settings.LOG_FILE)
+@lru_cache(maxsize=None)
+def endpoint_url(group: str, name: str) -> str:
+    """Full URL template for a ZOOM_ENDPOINTS entry, built once per endpoint.
+
+    Templated paths keep their placeholders, e.g.
+    endpoint_url("USERS", "GET").format_map({"userId": user_id})
+    """
+    base = get_settings().ZOOM_API_URL.rstrip("/")
+    return base + ZOOM_ENDPOINTS[group][name]["PATH"]
+
+
+def configure_logging(settings: Settings) -> None:
+    """Apply the logging settings.
+
+    loguru's default sink logs everything from DEBUG up, so it is replaced
+    with one that honours LOG_LEVEL.  This removes every loguru handler, so
+    it is only called when the script is run directly; scripts that import
+    it keep their own sinks.  Debug messages with expensive arguments use
+    logger.opt(lazy=True), so their arguments are only evaluated when DEBUG
+    is enabled.
+    """
+    logger.remove()
+    logger.add(sys.stderr, level=settings.LOG_LEVEL)
+    if settings.LOG_FILE:
+        logger.add(settings.LOG_FILE, level=settings.LOG_LEVEL)
+
+
+#   Shared HTTP session so the auth request and every paginated GET reuse
+#   pooled keep-alive connections instead of a new TCP/TLS handshake each.
+session = requests.Session()
+#   Per-request headers are merged over these, so callers only pass deltas.
+session.headers.update(
+    {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+)
+#   Rate limiting (429) and transient server errors are retried here with
+#   exponential backoff, honouring Zoom's Retry-After header.  Once retries
+#   are exhausted the last response is returned for the caller to handle.
+session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=8,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ),
+    ),
+)
 
 
 def auth(
-    url: str = str(settings.ZOOM_AUTH_URL),
-    username: str = settings.ZOOM_CLIENT_ID,
-    password: str = settings.ZOOM_CLIENT_SECRET.get_secret_value(),
-    account_id: str = settings.ZOOM_ACCOUNT_ID,
-    headers: Dict[str, str] = {"Content-Type": "application/x-www-form-urlencoded"},
+    url: Optional[str] = None,
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    account_id: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
 ) -> Tuple[Optional[str], Optional[int]]:
     """Retrieve an auth token from Zoom
 
@@ -137,9 +272,17 @@ def auth(
     The request body contains:
         - 'grant_type': 'account_credentials'
         - 'account_id': '`ZOOM_ACCOUNT_ID`'
+    Any argument left as None is taken from the settings.
     """
-    logger.debug("Making auth request to %s", url)
-    resp = requests.post(
+    settings = get_settings()
+    url = url or settings.ZOOM_AUTH_URL
+    username = username or settings.ZOOM_CLIENT_ID
+    password = password or settings.ZOOM_CLIENT_SECRET.get_secret_value()
+    account_id = account_id or settings.ZOOM_ACCOUNT_ID
+    if headers is None:
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    logger.debug("Making auth request to {}", url)
+    resp = session.post(
         url=url,
         auth=(username, password),
         data={
@@ -148,175 +291,483 @@ def auth(
         },
         headers=headers,
     )
-    logger.debug("Auth request status: %s", resp.status_code)
-    logger.debug("Auth request message: %s", resp.reason)
+    logger.debug("Auth request status: {}", resp.status_code)
+    logger.debug("Auth request message: {}", resp.reason)
     try:
-        data = resp.json()
+        data = orjson.loads(resp.content)
         logger.debug("Auth response has data.")
-        logger.debug("%s", data)
+        # Only the keys: the body contains the access token
+        logger.opt(lazy=True).debug("Auth response keys: {}", lambda: list(data))
     except json.JSONDecodeError:
         logger.error("Auth response has no data.")
         return None, None
     return (data.get("access_token", None), data.get("expires_in", None))
 
 
+def token_cache_path(
+    cache_dir: Optional[Path] = None,
+    client_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+) -> Path:
+    """Path of the token cache file for this client/account pair.
+
+    The file name is a hash of the client and account ids, so several
+    tenants can share one cache directory without colliding.  Any argument
+    left as None is taken from the settings.
+    """
+    settings = get_settings()
+    cache_dir = cache_dir or settings.TOKEN_CACHE_DIR
+    client_id = client_id or settings.ZOOM_CLIENT_ID
+    account_id = account_id or settings.ZOOM_ACCOUNT_ID
+    key = hashlib.sha256(f"{client_id}{account_id}".encode("utf-8")).hexdigest()
+    return cache_dir / f"{key}.json"
+
+
+def load_cached_token(min_ttl: int = 60) -> Optional[str]:
+    """Return the cached access token if it is valid for at least min_ttl seconds."""
+    path = token_cache_path()
+    try:
+        with open(file=path, mode="r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        cached = None
+    if not isinstance(cached, dict):
+        logger.debug("No usable token cache at {}", path)
+        return None
+    if cached.get("expires_at", 0) - time.time() <= min_ttl:
+        logger.debug("Cached token is expired or about to expire.")
+        return None
+    return cached.get("access_token", None)
+
+
+def save_cached_token(token: str, expires_in: int, buffer: int = 300) -> None:
+    """Cache an access token, expiring it `buffer` seconds early.
+
+    The cache file is created with mode 0600 since it holds a credential.
+    """
+    path = token_cache_path()
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(file=fd, mode="w", encoding="utf-8") as f:
+            json.dump(
+                obj={
+                    "access_token": token,
+                    "expires_at": time.time() + expires_in - buffer,
+                },
+                fp=f,
+            )
+    except OSError as e:
+        logger.warning("Unable to cache access token at {}: {}", path, e)
+
+
+def get_token() -> str:
+    """Return a Zoom access token, reusing a cached one while it is valid.
+
+    Otherwise authenticates with auth() and caches the new token along with
+    its expiration time, unless TOKEN_CACHE is disabled.  Raises an
+    Exception if authentication fails, since nothing can be retrieved
+    without a token.
+    """
+    use_cache = get_settings().TOKEN_CACHE
+    if use_cache:
+        token = load_cached_token()
+        if token:
+            logger.info("Using cached Zoom access token.")
+            return token
+
+    logger.info("Attempting authentication to Zoom...")
+    token, expires_in = auth()
+    if not token:
+        logger.error("Authentication failed!")
+        raise Exception("Unable to authenticate to Zoom.")
+    logger.info("Authenticated to Zoom.")
+    if use_cache and expires_in:
+        save_cached_token(token, expires_in)
+    return token
+
+
+def clear_cached_token() -> None:
+    """Delete the cached access token, e.g. after Zoom rejected it."""
+    path = token_cache_path()
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Unable to remove cached access token at {}: {}", path, e)
+
+
+#   Serializes token renewal between the threads paginating concurrently
+token_lock = threading.Lock()
+
+
+def renew_token(rejected: str) -> None:
+    """Replace a session Authorization header that Zoom rejected with a 401.
+
+    A cached token can be rejected before it expires, e.g. after the app's
+    credentials are rotated or deactivated.  The cache entry is dropped and
+    a new token is requested.  Threads that see the 401 for the same header
+    only renew it once.
+    """
+    with token_lock:
+        if session.headers.get("Authorization") != rejected:
+            # Another thread already renewed it
+            return
+        logger.warning("Zoom rejected the access token, re-authenticating.")
+        clear_cached_token()
+        session.headers["Authorization"] = f"Bearer {get_token()}"
+
+
+def response_cache_path(url: str, query: Dict) -> Path:
+    """Path of the cached response for a GET of url with query.
+
+    The account id is part of the key, so tenants sharing a cache directory
+    do not read each other's responses.
+    """
+    settings = get_settings()
+    request = f"{settings.ZOOM_ACCOUNT_ID}:{url}?{urlencode(sorted(query.items()))}"
+    key = hashlib.blake2b(request.encode("utf-8")).hexdigest()
+    return settings.RESPONSE_CACHE_DIR / f"{key}.json"
+
+
+def load_cached_response(url: str, query: Dict, ttl: int) -> Optional[Dict]:
+    """Return the cached body for a GET if it is younger than ttl seconds."""
+    path = response_cache_path(url, query)
+    try:
+        if time.time() - path.stat().st_mtime >= ttl:
+            return None
+        data = orjson.loads(path.read_bytes())
+    except (OSError, json.JSONDecodeError):
+        return None
+    logger.debug("Using cached response for GET {}", url)
+    return data
+
+
+def get_page(
+    url: str,
+    query: Dict,
+    headers: Dict[str, str],
+    allow_missing: bool = False,
+    retry_auth: bool = True,
+) -> Optional[Dict]:
+    """Make a single GET request and return the decoded JSON body.
+
+    Raises an Exception if the response is not a 200 once the session's
+    retries are exhausted, rather than silently truncating the results.
+    Returns None if the response has no JSON data, or is a 404 and
+    allow_missing is set.
+
+    If ZOOM_CACHE_TTL is set, successful responses are cached on disk and
+    reused for that many seconds.
+
+    If the session's token is rejected with a 401, it is renewed with
+    renew_token() and the request is retried once.
+    """
+    cache_ttl = get_settings().ZOOM_CACHE_TTL
+    if cache_ttl > 0:
+        data = load_cached_response(url, query, cache_ttl)
+        if data is not None:
+            return data
+    resp = session.get(
+        url=url,
+        params=query,
+        headers=headers,
+    )
+    if (
+        retry_auth
+        and resp.status_code == HTTPStatus.UNAUTHORIZED
+        and "Authorization" not in headers
+    ):
+        renew_token(resp.request.headers.get("Authorization", ""))
+        return get_page(url, query, headers, allow_missing, retry_auth=False)
+    if allow_missing and resp.status_code == HTTPStatus.NOT_FOUND:
+        logger.debug("GET {} not found.", url)
+        return None
+    if resp.status_code != HTTPStatus.OK:
+        logger.error("Non-200 response!")
+        logger.error("Status code: {}", resp.status_code)
+        logger.error("Reason: {}", resp.reason)
+        raise Exception(f"GET request to {url} failed: {resp.status_code}")
+    try:
+        # orjson parses the raw body in native code; its JSONDecodeError
+        # subclasses json.JSONDecodeError
+        data = orjson.loads(resp.content)
+        logger.opt(lazy=True).debug("GET response data size: {}", lambda: len(data))
+    except json.JSONDecodeError:
+        logger.error("GET response has no data!")
+        return None
+    if cache_ttl > 0:
+        try:
+            # Pages include user emails, so keep them private like the token
+            write_atomic(resp.content, response_cache_path(url, query), private=True)
+        except OSError as e:
+            logger.warning("Unable to cache response for GET {}: {}", url, e)
+    return data
+
+
 def do_get(
     url: str,
     auth: Optional[Dict[str, str]] = None,
-    query: Dict = {"page_size": 100},
-    headers: Dict[str, str] = {},
+    query: Optional[Dict] = None,
+    headers: Optional[Dict[str, str]] = None,
     next_page: Optional[str] = None,
-) -> List[Dict]:
-    """Get all paginated results from the URL/query.
+) -> Iterator[Dict]:
+    """Yield all paginated results from the URL/query.
 
     If a GET request to the Zoom Phone API has more results than the
     page_size in the query (max 100), then a next_page_token will be
     returned in the response.  This token is used to request the next
     page.
+
+    As soon as a page is received, the request for the following page is
+    started in the background, so the next network round trip overlaps
+    with the caller's processing of the current page.
+
+    The Authorization header may be passed through `auth`/`headers` or
+    already be set on the shared session.
     """
-    logger.debug("Making GET request to: %s", url)
-    logger.debug("Query: %s", query)
-    results = []
+    logger.debug("Making GET request to: {}", url)
+    # Copy once so the caller's query and headers are never mutated
+    query = {"page_size": 100} if query is None else dict(query)
+    headers = {} if headers is None else dict(headers)
+    logger.debug("Query: {}", query)
     if auth:
         logger.debug("Adding auth header to headers.")
         headers.update(auth)
-    elif "Authorization" not in headers:
+    elif "Authorization" not in headers and "Authorization" not in session.headers:
         logger.error("Did not receive an authentication form (header or parameter)!")
         raise Exception("Authorization header missing from GET request.")
     if next_page:
         logger.debug("Adding next_page_token to query string")
         query["next_page_token"] = next_page
-        logger.debug("New query: %s", query)
-    resp = requests.get(
-        url=url,
-        params=query,
-        headers=headers,
-    )
-    if resp.status_code != HTTPStatus.OK:
-        logger.error("Non-200 response!")
-        logger.error("Status code: %s", resp.status_code)
-        logger.error("Reason: %s", resp.reason)
-        return []
-    try:
-        results.append(resp.json())
-        logger.debug("GET response data size: %s", len(results[-1]))
-    except json.JSONDecodeError:
-        logger.error("GET response has no data!")
-        return []
-    # Try to get a next_page_token from the new result
-    next_page = results[-1].get("next_page_token", None)
-    # Recursively process all subsequent pages
-    if next_page:
-        logger.debug("Response has a next page")
-        query["next_page_token"] = next_page
-        results.extend(do_get(url=url, query=query, headers=headers))
-    return results
+        logger.debug("New query: {}", query)
+    # A single worker is enough: only one page can be in flight, since each
+    # request needs the token from the page before it.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(get_page, url, dict(query), headers)
+        while future:
+            page = future.result()
+            if page is None:
+                return
+            # Try to get a next_page_token from the new result
+            next_page = page.get("next_page_token", None)
+            future = None
+            if next_page:
+                logger.debug("Response has a next page")
+                query["next_page_token"] = next_page
+                future = executor.submit(get_page, url, dict(query), headers)
+            yield page
+
+
+def iter_records(url: str, key: str, **kwargs: Any) -> Iterator[Dict]:
+    """Yield each record in the `key` list of every page from do_get.
+
+    Keyword arguments are passed through to do_get.  No list of pages or
+    records is built, but as do_get fetches the next page while the current
+    one is read, up to two pages are held at a time.
+    """
+    for page in do_get(url, **kwargs):
+        yield from page.get(key, ())
 
 
-if __name__ == "__main__":
-    logger.info(">>>   Zoom Phone Number Script    <<<")
-    logger.info("Retrieved settings from %s.", settings.model_config["env_file"])
-    logger.debug("Settings dump:\n%s", settings.model_dump())
+def extract_user_emails(users: Iterable[Dict]) -> Dict[str, str]:
+    """Extract user.id -> user.email from GET /phone/users records.
 
+    https://developers.zoom.us/docs/api/rest/reference/phone/methods/#operation/listPhoneUsers
+    """
+    return {user["id"]: user["email"] for user in users}
+
+
+def extract_phone_numbers(
+    phone_numbers: Iterable[Dict],
+) -> Tuple[
+    Dict[str, str], Dict[str, str], Dict[str, str], Dict[str, int], Set[str]
+]:
+    """Sort GET /phone/numbers records into the output maps in one pass.
+
+    Returns (all_phone_numbers, unassigned_phone_numbers,
+    user_phone_numbers, user_extensions, user_ids).  Numbers can also be
+    assigned to call queues, common areas, etc., so user_ids holds only the
+    assignees whose type is user.
+    https://developers.zoom.us/docs/api/rest/reference/phone/methods/#operation/listAccountPhoneNumbers
+    """
     all_phone_numbers = {}
     unassigned_phone_numbers = {}
     user_phone_numbers = {}
-    user_emails = {}
     user_extensions = {}
+    user_ids = set()
+    for phone_number in phone_numbers:
+        number, number_id = phone_number["number"], phone_number["id"]
+        all_phone_numbers[number] = number_id
+        assignee = phone_number.get("assignee", None)
+        if assignee is not None:
+            assignee_id = assignee["id"]
+            user_phone_numbers[assignee_id] = number
+            if assignee.get("type", None) == "user":
+                user_ids.add(assignee_id)
+            extension = assignee.get("extension_number", None)
+            if extension:
+                user_extensions[assignee_id] = extension
+        else:
+            unassigned_phone_numbers[number] = number_id
+    return (
+        all_phone_numbers,
+        unassigned_phone_numbers,
+        user_phone_numbers,
+        user_extensions,
+        user_ids,
+    )
 
-    # Get an access token and store the expiration time (not used)
-    logger.info("Attempting authentication to Zoom...")
-    t_token, t_exp = auth()
 
-    # If a token was not returned, the script cannot continue.
-    if not t_token:
-        logger.error("Authentication failed!")
-        raise Exception("Unable to authenticate to Zoom.")
-    logger.info("Authenticated to Zoom.")
+def fetch_many(
+    url: str,
+    ids: Iterable[str],
+    placeholder: str,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Optional[Dict]]:
+    """GET one URL per id concurrently and return id -> decoded body.
+
+    `url` is an endpoint_url() template and each id is substituted for its
+    `placeholder`, e.g. fetch_many(endpoint_url("USERS", "GET"), ids, "userId").
+    Ids that return a 404 map to None.  max_workers bounds the number of
+    concurrent requests to stay within Zoom's rate limits, and defaults to
+    MAX_CONCURRENT_REQUESTS.  All requests share the session's keep-alive
+    connections.
+    """
+    if max_workers is None:
+        max_workers = get_settings().MAX_CONCURRENT_REQUESTS
+    ids = list(ids)
+
+    def get_one(item_id: str) -> Optional[Dict]:
+        item_url = url.format_map({placeholder: item_id})
+        return get_page(item_url, {}, {}, allow_missing=True)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(ids, executor.map(get_one, ids)))
+
+
+def fetch_user_emails(user_ids: Iterable[str]) -> Dict[str, str]:
+    """Look up user.id -> user.email for specific users concurrently.
+
+    Uses GET /phone/users/{userId}, so user_ids must only hold phone users;
+    see extract_phone_numbers.  Users deleted since the number listing are
+    skipped, and like the status=activate filter on the bulk listing, only
+    active users are included.
+    https://developers.zoom.us/docs/api/rest/reference/phone/methods/#operation/phoneUser
+    """
+    users = fetch_many(endpoint_url("USERS", "GET"), user_ids, "userId")
+    return {
+        user_id: user["email"]
+        for user_id, user in users.items()
+        if user
+        and user.get("status", None) == "activate"
+        and user.get("email", None)
+    }
 
-    # Get all licensed Zoom Phone user objects
-    all_user_responses = do_get(
-        url=f"{settings.ZOOM_API_URL}"
-        + f"{settings.ZOOM_ENDPOINTS['USERS']['GET_ALL']['PATH']}",
-        auth={"Authorization": f"Bearer {t_token}"},
-        query={"page_size": 100, "status": "activate"},
-    )
 
-    # Condense the paged results (list of objects) into
-    # a single list of objects
-    users_list: List[Dict] = []
-    for response in all_user_responses:
-        users_list.extend(response.get("users", []))
-
-    # Extract the ids and emails from the responses
-    # https://developers.zoom.us/docs/api/rest/reference/phone/methods/#operation/listPhoneUsers
-    for user in users_list:
-        user_emails[user["id"]] = user["email"]
-
-    # Get all Zoom Phone phone number objects
-    all_phone_responses = do_get(
-        url=f"{settings.ZOOM_API_URL}"
-        + f"{settings.ZOOM_ENDPOINTS['PHONES']['GET_ALL']['PATH']}",
-        auth={"Authorization": f"Bearer {t_token}"},
-        query={"page_size": 100, "type": "all"},
+def write_atomic(data: bytes, path: Union[str, Path], private: bool = False) -> None:
+    """Atomically write data to path, creating its directory if needed.
+
+    The data is written and synced to a temporary file that then replaces
+    path, so readers only ever see the previous or the new complete file.
+    If private, the directory is created with mode 0700 and the file with
+    mode 0600, for data such as cached user records.
+    """
+    dir_mode, file_mode = (0o700, 0o600) if private else (0o777, 0o666)
+    Path(path).parent.mkdir(mode=dir_mode, parents=True, exist_ok=True)
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, file_mode)
+    with open(file=fd, mode="wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_json(obj: Dict, path: Union[str, Path]) -> None:
+    """Atomically write obj to path as sorted, indented JSON.
+
+    orjson serializes in native code, which is much faster than the pure
+    Python indenting encoder used by json.dump.  It only supports a
+    two-space indent.
+    """
+    # Serialize first so an encoding error leaves no temporary file behind
+    write_atomic(
+        orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2), path
     )
 
-    logger.debug("Processing phone_number responses:\n%s", all_phone_responses)
-    # Condense the paged results (lists of objects) into
-    # a single list of objects
-    phone_numbers_list: List[Dict] = []
-    for response in all_phone_responses:
-        phone_numbers_list.extend(response.get("phone_numbers", []))
-
-    # Extract the phone numbers from the responses
-    # https://developers.zoom.us/docs/api/rest/reference/phone/methods/#operation/listAccountPhoneNumbers
-    for phone_number in phone_numbers_list:
-        all_phone_numbers[phone_number["number"]] = phone_number["id"]
-        if "assignee" in phone_number:
-            user_phone_numbers[phone_number["assignee"]["id"]] = phone_number["number"]
-            extension = phone_number["assignee"].get("extension_number", None)
-            if extension:
-                user_extensions[phone_number["assignee"]["id"]] = extension
-        else:
-            unassigned_phone_numbers[phone_number["number"]] = phone_number["id"]
-
-    with open(file="./user_phone_numbers.json", mode="w", encoding="utf-8") as f:
-        json.dump(
-            obj=user_phone_numbers,
-            fp=f,
-            sort_keys=True,
-            indent=4,
-            separators=(",", ": "),
-        )
 
-    with open(file="./all_phone_numbers.json", mode="w", encoding="utf-8") as f:
-        json.dump(
-            obj=all_phone_numbers,
-            fp=f,
-            sort_keys=True,
-            indent=4,
-            separators=(",", ": "),
-        )
+def main() -> None:
+    """Collect the phone users and numbers and write the five JSON files.
 
-    with open(file="./user_extensions.json", mode="w", encoding="utf-8") as f:
-        json.dump(
-            obj=user_extensions,
-            fp=f,
-            sort_keys=True,
-            indent=4,
-            separators=(",", ": "),
-        )
+    Settings are loaded once, and every request goes through the module's
+    session: main() sets its Authorization header to the cached token, and
+    renew_token replaces it if Zoom rejects the token.  Other scripts can
+    call main() but should not share that session.  Logging is left as is;
+    configure_logging is only applied when the script is run directly.
+    """
+    settings = get_settings()
 
-    with open(file="./unassigned_phone_numbers.json", mode="w", encoding="utf-8") as f:
-        json.dump(
-            obj=unassigned_phone_numbers,
-            fp=f,
-            sort_keys=True,
-            indent=4,
-            separators=(",", ": "),
+    logger.info(">>>   Zoom Phone Number Script    <<<")
+    logger.info("Retrieved settings from {}.", settings.model_config["env_file"])
+    logger.opt(lazy=True).debug("Settings dump:\n{}", lambda: settings.model_dump())
+
+    t_token = get_token()
+    session.headers["Authorization"] = f"Bearer {t_token}"
+
+    # Get all licensed Zoom Phone user objects and all Zoom Phone phone
+    # number objects.  The two listings are independent, so they are
+    # paginated concurrently over the shared session.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        users_future = None
+        if not settings.ASSIGNED_USER_EMAILS_ONLY:
+            users_future = executor.submit(
+                extract_user_emails,
+                iter_records(
+                    endpoint_url("USERS", "GET_ALL"),
+                    "users",
+                    query={"page_size": 100, "status": "activate"},
+                ),
+            )
+        phones_future = executor.submit(
+            extract_phone_numbers,
+            iter_records(
+                endpoint_url("PHONES", "GET_ALL"),
+                "phone_numbers",
+                query={"page_size": 100, "type": "all"},
+            ),
         )
+        (
+            all_phone_numbers,
+            unassigned_phone_numbers,
+            user_phone_numbers,
+            user_extensions,
+            user_ids,
+        ) = phones_future.result()
+        if users_future is not None:
+            user_emails = users_future.result()
+
+    # Every assignee with an extension also has a number, so the user
+    # assignees of user_phone_numbers are the only users whose emails are needed
+    if settings.ASSIGNED_USER_EMAILS_ONLY:
+        user_emails = fetch_user_emails(user_ids)
+
+    outputs = (
+        (user_phone_numbers, "./user_phone_numbers.json"),
+        (all_phone_numbers, "./all_phone_numbers.json"),
+        (user_extensions, "./user_extensions.json"),
+        (unassigned_phone_numbers, "./unassigned_phone_numbers.json"),
+        (user_emails, "./user_emails.json"),
+    )
+    # The files are independent, so their writes and fsyncs are overlapped
+    with ThreadPoolExecutor(max_workers=len(outputs)) as executor:
+        futures = [executor.submit(write_json, obj, path) for obj, path in outputs]
+        # Re-raise any write error
+        for future in futures:
+            future.result()
 
-    with open(file="./user_emails.json", mode="w", encoding="utf-8") as f:
-        json.dump(
-            obj=user_emails, fp=f, sort_keys=True, indent=4, separators=(",", ": ")
-        )
+
+if __name__ == "__main__":
+    configure_logging(get_settings())
+    main()